@@ -1,13 +1,20 @@
 import streamlit as st
 import google.generativeai as genai
-import json
+import orjson
+import re
 import hashlib
+import hmac
 from datetime import datetime
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+import numpy as np
 from google.generativeai.types import HarmCategory, HarmBlockThreshold
+import os
 import time
+import pickle
+import tempfile
+import asyncio
+import threading
+from collections import deque
+from pathlib import Path
 
 # Page configuration
 st.set_page_config(
@@ -17,94 +24,121 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Rate limiting: at most RATE_LIMIT_CAPACITY requests in any trailing RATE_LIMIT_WINDOW seconds
+RATE_LIMIT_CAPACITY = 10
+RATE_LIMIT_WINDOW = 60
+
+# Extracts the JSON payload from a fenced code block or surrounding prose.
+# The block ends at a fence on its own line, so inline fences inside string
+# values and fences in trailing prose are both left alone.
+JSON_RESPONSE_RE = re.compile(r'```(?:json)?\s*(.*?)\s*^\s*```\s*$|(\{.*\}|\[.*\])', re.DOTALL | re.MULTILINE)
+
+# Prompt templates, filled in with str.format
+COURSE_PROMPT = """Create a detailed course outline for "{topic}" at {level} level.
+        The course should be designed for {duration} of learning.
+        
+        Format the response as JSON with the following structure:
+        {{
+            "title": "Course Title",
+            "description": "Brief description",
+            "modules": [
+                {{
+                    "name": "Module Name",
+                    "topics": ["Topic 1", "Topic 2"],
+                    "duration": "Estimated time"
+                }}
+            ],
+            "learning_outcomes": ["Outcome 1", "Outcome 2"],
+            "prerequisites": ["Prerequisite 1"]
+        }}
+        
+        Provide only the JSON, no additional text."""
+
+QUIZ_PROMPT = """Generate {num_questions} multiple-choice questions about "{topic}" at {difficulty} difficulty level.
+        
+        Format as JSON:
+        {{
+            "questions": [
+                {{
+                    "question": "Question text?",
+                    "options": ["A) Option 1", "B) Option 2", "C) Option 3", "D) Option 4"],
+                    "correct": "A",
+                    "explanation": "Why this is correct"
+                }}
+            ]
+        }}
+        
+        Provide only the JSON."""
+
+RECOMMENDATIONS_PROMPT = """Based on learning history: {user_history} and preferences: {preferences},
+        recommend 5 relevant courses. Return only a JSON array of course names:
+        ["Course 1", "Course 2", "Course 3", "Course 4", "Course 5"]"""
+
+# Safety settings shared by every Gemini model instance
+SAFETY_SETTINGS = {
+    HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
+    HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
+    HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
+    HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
+}
+
 # Custom CSS for better UI
-st.markdown("""
-<style>
-    .main-header {
-        font-size: 3rem;
-        font-weight: 700;
-        background: linear-gradient(120deg, #667eea 0%, #764ba2 100%);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-        text-align: center;
-        padding: 1rem 0;
-    }
-    .sub-header {
-        font-size: 1.5rem;
-        color: #667eea;
-        font-weight: 600;
-        margin-top: 1rem;
-    }
-    .course-card {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        padding: 1.5rem;
-        border-radius: 15px;
-        color: white;
-        margin: 1rem 0;
-        box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-    }
-    .quiz-card {
-        background: #f7fafc;
-        padding: 1.5rem;
-        border-radius: 10px;
-        border-left: 4px solid #667eea;
-        margin: 1rem 0;
-    }
-    .stat-box {
-        background: white;
-        padding: 1.5rem;
-        border-radius: 10px;
-        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-        text-align: center;
-    }
-    .stButton>button {
-        background: linear-gradient(120deg, #667eea 0%, #764ba2 100%);
-        color: white;
-        border: none;
-        border-radius: 8px;
-        padding: 0.5rem 2rem;
-        font-weight: 600;
-        transition: transform 0.2s;
-    }
-    .stButton>button:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 4px 8px rgba(0,0,0,0.2);
-    }
-    .success-msg {
-        background: #48bb78;
-        color: white;
-        padding: 1rem;
-        border-radius: 8px;
-        margin: 1rem 0;
-    }
-</style>
-""", unsafe_allow_html=True)
+@st.cache_resource(show_spinner=False)
+def load_css():
+    """Read the stylesheet once per server process"""
+    return f"<style>\n{(Path(__file__).parent / 'style.css').read_text()}</style>"
+
+# Streamlit drops elements that are not re-emitted, so inject on every run
+st.markdown(load_css(), unsafe_allow_html=True)
+
+# Registered users, persisted to disk and shared by every session
+USERS_FILE = Path(__file__).parent / 'users.pkl'
+
+@st.cache_resource(show_spinner=False)
+def users_store():
+    """Username -> password digest, loaded from disk once per server process"""
+    if USERS_FILE.exists():
+        return pickle.loads(USERS_FILE.read_bytes())
+    return {}
+
+@st.cache_resource(show_spinner=False)
+def users_lock():
+    """Serializes signups across the sessions sharing users_store()"""
+    return threading.Lock()
+
+def save_users():
+    # Callers must hold users_lock(). Write to a unique temporary file first
+    # so a crash never leaves a truncated store.
+    with tempfile.NamedTemporaryFile(dir=USERS_FILE.parent, delete=False) as tmp_file:
+        pickle.dump(users_store(), tmp_file)
+    os.replace(tmp_file.name, USERS_FILE)
 
 # Initialize session state
-if 'users' not in st.session_state:
-    st.session_state.users = {}
-if 'logged_in' not in st.session_state:
-    st.session_state.logged_in = False
-if 'current_user' not in st.session_state:
-    st.session_state.current_user = None
-if 'user_data' not in st.session_state:
-    st.session_state.user_data = {}
-if 'api_key' not in st.session_state:
-    st.session_state.api_key = None
-if 'last_request_time' not in st.session_state:
-    st.session_state.last_request_time = 0
-if 'request_count' not in st.session_state:
-    st.session_state.request_count = 0
+# Built on every run, so each new session gets its own mutable containers
+SESSION_DEFAULTS = {
+    'logged_in': False,
+    'current_user': None,
+    'user_data': {},
+    'api_key': None,
+    'req_times': deque(),
+}
+for key, value in SESSION_DEFAULTS.items():
+    st.session_state.setdefault(key, value)
 
 # Helper functions
 def hash_password(password):
-    return hashlib.sha256(password.encode()).hexdigest()
+    return hashlib.blake2b(password.encode()).digest()
+
+def current_timestamp():
+    """Current local time as 'YYYY-MM-DD HH:MM', built without strftime"""
+    now = datetime.now()
+    return f"{now.year}-{now.month:02d}-{now.day:02d} {now.hour:02d}:{now.minute:02d}"
 
 def initialize_user_data(username):
     if username not in st.session_state.user_data:
         st.session_state.user_data[username] = {
             'courses': [],
-            'quiz_history': [],
+            'quiz_history': {'topics': [], 'scores': [], 'dates': []},
             'learning_preferences': [],
             'total_score': 0,
             'courses_completed': 0,
@@ -122,23 +156,38 @@ def configure_gemini():
             return False
     return False
 
+def api_key_hash():
+    """Hash of the current API key, used to key caches without storing the raw key"""
+    return hashlib.sha256(st.session_state.api_key.encode()).hexdigest()
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def list_models_cached(key_hash, _api_key):
+    """List models supporting generateContent, cached per API key hash"""
+    genai.configure(api_key=_api_key)
+    # Extract just the model name without 'models/' prefix
+    return [
+        m.name.replace('models/', '')
+        for m in genai.list_models()
+        if 'generateContent' in m.supported_generation_methods
+    ]
+
 def test_api_key_and_list_models():
     """Test API key and list available models"""
     if not st.session_state.api_key:
         return None, "No API key provided"
     
     try:
-        genai.configure(api_key=st.session_state.api_key)
-        models = []
-        for m in genai.list_models():
-            if 'generateContent' in m.supported_generation_methods:
-                # Extract just the model name without 'models/' prefix
-                model_name = m.name.replace('models/', '')
-                models.append(model_name)
+        models = list_models_cached(api_key_hash(), st.session_state.api_key)
         return models, None
     except Exception as e:
         return None, str(e)
 
+@st.cache_resource(show_spinner=False)
+def get_model(key_hash, _api_key, model_name):
+    """Configured GenerativeModel, shared across reruns per API key and model"""
+    genai.configure(api_key=_api_key)
+    return genai.GenerativeModel(model_name, safety_settings=SAFETY_SETTINGS)
+
 def get_working_model():
     """Get the first working model, prioritizing Flash models for rate limits"""
     if 'working_model' in st.session_state and st.session_state.working_model:
@@ -169,143 +218,182 @@ def get_working_model():
     
     return None
 
-def rate_limit_check():
-    """Simple rate limiting to avoid quota issues"""
-    current_time = time.time()
-    
-    # Reset counter every minute
-    if current_time - st.session_state.last_request_time > 60:
-        st.session_state.request_count = 0
-        st.session_state.last_request_time = current_time
-    
-    # Check if we've made too many requests
-    if st.session_state.request_count >= 10:  # Max 10 requests per minute
-        wait_time = 60 - (current_time - st.session_state.last_request_time)
-        if wait_time > 0:
-            st.warning(f"⏳ Rate limit protection: Please wait {int(wait_time)} seconds before making another request.")
-            return False
-    
-    st.session_state.request_count += 1
+def prune_request_log(now):
+    """Drop request timestamps that have left the sliding window"""
+    req_times = st.session_state.req_times
+    while req_times and req_times[0] <= now - RATE_LIMIT_WINDOW:
+        req_times.popleft()
+    return req_times
+
+def rate_limit_check(cost=1):
+    """Sliding window rate limiting to avoid quota issues"""
+    now = time.time()
+    req_times = prune_request_log(now)
+    
+    if len(req_times) + cost > RATE_LIMIT_CAPACITY:
+        # Wait until enough of the oldest requests have left the window
+        oldest = req_times[len(req_times) + cost - RATE_LIMIT_CAPACITY - 1]
+        wait_time = RATE_LIMIT_WINDOW - (now - oldest)
+        st.warning(f"⏳ Rate limit protection: Please wait {int(wait_time) + 1} seconds before making another request.")
+        return False
+    
+    req_times.extend([now] * cost)
     return True
 
-def generate_course(topic, level, duration):
-    if not configure_gemini():
-        return None
-    
-    if not rate_limit_check():
-        return None
-    
-    model_name = get_working_model()
-    if not model_name:
-        st.error("❌ No working model found. Please check your API key.")
-        return None
-    
+@st.cache_resource(show_spinner=False)
+def get_event_loop():
+    """Background event loop shared by all sessions for async Gemini calls"""
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return loop
+
+def submit_async(*coros):
+    """Schedule coroutines on the shared loop; the returned future yields results (or exceptions) in order"""
+    async def gather():
+        return await asyncio.gather(*coros, return_exceptions=True)
+    return asyncio.run_coroutine_threadsafe(gather(), get_event_loop())
+
+async def fetch_response_text(model, prompt):
+    response = await model.generate_content_async(prompt)
+    return response.text
+
+def submit_batch(model, prompts):
+    """Send all prompts in one concurrent round without waiting for the results"""
+    return submit_async(*(fetch_response_text(model, prompt) for prompt in prompts))
+
+def generate_batch(model, prompts):
+    """Send all prompts in one concurrent round; results are returned by index"""
+    return submit_batch(model, prompts).result()
+
+def stream_response_text(model, prompt):
+    """Stream a response to the page as it arrives and return the full text"""
+    placeholder = st.empty()
+    buffer = ""
     try:
-        model = genai.GenerativeModel(
-            model_name,
-            safety_settings={
-                HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
-            }
-        )
-        
-        st.info(f"🤖 Using model: {model_name}")
-            
-        prompt = f"""Create a detailed course outline for "{topic}" at {level} level.
-        The course should be designed for {duration} of learning.
-        
-        Format the response as JSON with the following structure:
-        {{
-            "title": "Course Title",
-            "description": "Brief description",
-            "modules": [
-                {{
-                    "name": "Module Name",
-                    "topics": ["Topic 1", "Topic 2"],
-                    "duration": "Estimated time"
-                }}
-            ],
-            "learning_outcomes": ["Outcome 1", "Outcome 2"],
-            "prerequisites": ["Prerequisite 1"]
-        }}
-        
-        Provide only the JSON, no additional text."""
-        
-        response = model.generate_content(prompt)
-        # Clean the response to extract JSON
-        text = response.text.strip()
-        if text.startswith('```json'):
-            text = text[7:]
-        if text.startswith('```'):
-            text = text[3:]
-        if text.endswith('```'):
-            text = text[:-3]
-        course_data = json.loads(text.strip())
-        course_data['created_date'] = datetime.now().strftime("%Y-%m-%d")
-        course_data['user_topic'] = topic
-        course_data['level'] = level
-        return course_data
-    except Exception as e:
-        st.error(f"Error generating course: {str(e)}")
-        return None
+        for chunk in model.generate_content(prompt, stream=True):
+            buffer += chunk.text
+            placeholder.code(buffer + "▌", language="json")
+    finally:
+        # Clear the partial output even if the stream fails midway
+        placeholder.empty()
+    return buffer
 
-def generate_quiz(topic, difficulty, num_questions):
+def parse_json_response(text):
+    """Extract and parse the JSON payload, ignoring code fences and extra prose"""
+    match = JSON_RESPONSE_RE.search(text)
+    if match:
+        payload = match.group(1) if match.group(1) is not None else match.group(2)
+    else:
+        payload = text
+    if not payload.strip():
+        raise ValueError("Empty JSON response")
+    return orjson.loads(payload)
+
+def expect_json_object(data, required_keys=()):
+    """Return data if it is a JSON object with required_keys, else raise ValueError"""
+    if not isinstance(data, dict) or any(key not in data for key in required_keys):
+        raise ValueError("unexpected response format")
+    return data
+
+def gemini_json(prompt, label, companion_prompts=(), required_keys=()):
+    """Stream a prompt's JSON object reply from the working model and parse it.
+
+    companion_prompts are sent concurrently in the background while the reply
+    streams. Returns (data, companion_results); data is None if the request
+    failed or the reply is not an object with required_keys, in which case
+    the error is shown as "Error generating {label}".
+    """
     if not configure_gemini():
-        return None
+        return None, []
     
-    if not rate_limit_check():
-        return None
+    # Every prompt is a billed request, so reserve a slot for each companion too
+    if not rate_limit_check(1 + len(companion_prompts)):
+        return None, []
     
     model_name = get_working_model()
     if not model_name:
         st.error("❌ No working model found. Please check your API key.")
         st.info("💡 Get a new API key from: https://aistudio.google.com/app/apikey")
-        return None
+        return None, []
     
+    companion_results = []
     try:
-        model = genai.GenerativeModel(
-            model_name,
-            safety_settings={
-                HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
-            }
-        )
+        model = get_model(api_key_hash(), st.session_state.api_key, model_name)
         
         st.info(f"🤖 Using model: {model_name}")
-            
-        prompt = f"""Generate {num_questions} multiple-choice questions about "{topic}" at {difficulty} difficulty level.
-        
-        Format as JSON:
-        {{
-            "questions": [
-                {{
-                    "question": "Question text?",
-                    "options": ["A) Option 1", "B) Option 2", "C) Option 3", "D) Option 4"],
-                    "correct": "A",
-                    "explanation": "Why this is correct"
-                }}
-            ]
-        }}
-        
-        Provide only the JSON."""
         
-        response = model.generate_content(prompt)
-        # Clean the response to extract JSON
-        text = response.text.strip()
-        if text.startswith('```json'):
-            text = text[7:]
-        if text.startswith('```'):
-            text = text[3:]
-        if text.endswith('```'):
-            text = text[:-3]
-        return json.loads(text.strip())
+        companions = submit_batch(model, list(companion_prompts))
+        try:
+            text = stream_response_text(model, prompt)
+        finally:
+            companion_results = companions.result()
+        return expect_json_object(parse_json_response(text), required_keys), companion_results
     except Exception as e:
-        st.error(f"Error generating quiz: {str(e)}")
+        st.error(f"Error generating {label}: {str(e)}")
+        return None, companion_results
+
+def parse_json_result(result):
+    """Parse a batch result, re-raising the exception if its request failed"""
+    if isinstance(result, Exception):
+        raise result
+    return parse_json_response(result)
+
+def generate_course(topic, level, duration, user_history=None, preferences=None, quiz_options=None):
+    """Generate a course outline.
+
+    The outline is streamed to the page as it is generated. When user_history
+    is given, recommendations for that history are fetched in the background
+    and stored in st.session_state.prefetched_recommendations. When
+    quiz_options is a (difficulty, num_questions) pair, a quiz on the topic is
+    generated alongside and loaded as st.session_state.current_quiz.
+    """
+    companion_prompts = []
+    if user_history is not None:
+        companion_prompts.append(RECOMMENDATIONS_PROMPT.format(user_history=user_history, preferences=preferences))
+    if quiz_options:
+        difficulty, num_questions = quiz_options
+        companion_prompts.append(QUIZ_PROMPT.format(topic=topic, difficulty=difficulty, num_questions=num_questions))
+    
+    prompt = COURSE_PROMPT.format(topic=topic, level=level, duration=duration)
+    course_data, results = gemini_json(prompt, "course", companion_prompts)
+    
+    if results and user_history is not None:
+        try:
+            st.session_state.prefetched_recommendations = (
+                (tuple(user_history), tuple(preferences)),
+                parse_json_result(results.pop(0))
+            )
+        except Exception:
+            pass
+    
+    if results and quiz_options:
+        try:
+            st.session_state.current_quiz = expect_json_object(parse_json_result(results.pop(0)), ('questions',))
+            st.session_state.quiz_answers = {}
+            st.session_state.quiz_score = None
+            st.session_state.quiz_topic = topic
+        except Exception as e:
+            st.error(f"Error generating quiz: {str(e)}")
+    
+    if course_data is None:
         return None
+    course_data['created_date'] = current_timestamp()[:10]
+    course_data['user_topic'] = topic
+    course_data['level'] = level
+    return course_data
+
+def generate_quiz(topic, difficulty, num_questions):
+    prompt = QUIZ_PROMPT.format(topic=topic, difficulty=difficulty, num_questions=num_questions)
+    quiz, _ = gemini_json(prompt, "quiz", required_keys=('questions',))
+    return quiz
+
+@st.cache_data(ttl=600, show_spinner=False)
+def cached_recommendations(user_history, preferences, key_hash, model_name, _api_key):
+    """Recommendations for a (history, preferences) pair, cached so page reruns skip the API call"""
+    model = get_model(key_hash, _api_key, model_name)
+    prompt = RECOMMENDATIONS_PROMPT.format(user_history=list(user_history), preferences=list(preferences))
+    result, = generate_batch(model, [prompt])
+    return parse_json_result(result)
 
 def get_recommendations(user_history, preferences):
     if not configure_gemini() or not user_history:
@@ -316,30 +404,9 @@ def get_recommendations(user_history, preferences):
         return ["Python Programming", "Data Science Basics", "Web Development", "Machine Learning Introduction", "AI Fundamentals"]
     
     try:
-        model = genai.GenerativeModel(
-            model_name,
-            safety_settings={
-                HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
-            }
+        return cached_recommendations(
+            tuple(user_history), tuple(preferences), api_key_hash(), model_name, st.session_state.api_key
         )
-            
-        prompt = f"""Based on learning history: {user_history} and preferences: {preferences},
-        recommend 5 relevant courses. Return only a JSON array of course names:
-        ["Course 1", "Course 2", "Course 3", "Course 4", "Course 5"]"""
-        
-        response = model.generate_content(prompt)
-        # Clean the response to extract JSON
-        text = response.text.strip()
-        if text.startswith('```json'):
-            text = text[7:]
-        if text.startswith('```'):
-            text = text[3:]
-        if text.endswith('```'):
-            text = text[:-3]
-        return json.loads(text.strip())
     except:
         return ["Python Programming", "Data Science Basics", "Web Development", "Machine Learning Introduction", "AI Fundamentals"]
 
@@ -359,8 +426,8 @@ def auth_page():
             password = st.text_input("Password", type="password", key="login_password")
             
             if st.button("Login", use_container_width=True):
-                if username in st.session_state.users:
-                    if st.session_state.users[username] == hash_password(password):
+                if username in users_store():
+                    if hmac.compare_digest(users_store()[username], hash_password(password)):
                         st.session_state.logged_in = True
                         st.session_state.current_user = username
                         initialize_user_data(username)
@@ -380,14 +447,17 @@ def auth_page():
             
             if st.button("Sign Up", use_container_width=True):
                 if new_username and new_password and email:
-                    if new_username not in st.session_state.users:
-                        if new_password == confirm_password:
-                            st.session_state.users[new_username] = hash_password(new_password)
-                            st.success("✅ Account created! Please login.")
+                    # Hold the lock from the existence check through the save
+                    with users_lock():
+                        if new_username not in users_store():
+                            if new_password == confirm_password:
+                                users_store()[new_username] = hash_password(new_password)
+                                save_users()
+                                st.success("✅ Account created! Please login.")
+                            else:
+                                st.error("❌ Passwords don't match")
                         else:
-                            st.error("❌ Passwords don't match")
-                    else:
-                        st.error("❌ Username already exists")
+                            st.error("❌ Username already exists")
                 else:
                     st.error("❌ Please fill all fields")
 
@@ -459,9 +529,9 @@ def dashboard():
         st.markdown('</div>', unsafe_allow_html=True)
     
     # Rate limit info
-    if st.session_state.request_count > 0:
-        remaining = 10 - st.session_state.request_count
-        st.info(f"⚡ API requests this minute: {st.session_state.request_count}/10 (Rate limit protection active)")
+    request_count = len(prune_request_log(time.time()))
+    if request_count > 0:
+        st.info(f"⚡ API requests this minute: {request_count}/{RATE_LIMIT_CAPACITY} (Rate limit protection active)")
     
     st.markdown("---")
     
@@ -469,7 +539,11 @@ def dashboard():
     st.markdown('<h2 class="sub-header">🎯 Recommended For You</h2>', unsafe_allow_html=True)
     
     history = [c['user_topic'] for c in user_stats['courses']]
-    recommendations = get_recommendations(history, user_stats['learning_preferences'])
+    prefetched = st.session_state.get('prefetched_recommendations')
+    if prefetched and prefetched[0] == (tuple(history), tuple(user_stats['learning_preferences'])):
+        recommendations = prefetched[1]
+    else:
+        recommendations = get_recommendations(history, user_stats['learning_preferences'])
     
     cols = st.columns(min(len(recommendations), 3))
     for idx, rec in enumerate(recommendations[:3]):
@@ -496,15 +570,29 @@ def course_generator():
         with col_b:
             duration = st.selectbox("⏱️ Duration", ["1 week", "2 weeks", "1 month", "3 months"])
         
+        with_quiz = st.checkbox("📝 Also create a quiz on this topic")
+        if with_quiz:
+            col_c, col_d = st.columns(2)
+            with col_c:
+                quiz_difficulty = st.selectbox("🎯 Quiz Difficulty", ["Easy", "Medium", "Hard"])
+            with col_d:
+                quiz_questions = st.slider("❓ Number of Questions", 3, 10, 5)
+        
         if st.button("🚀 Generate Course", use_container_width=True):
             with st.spinner("Creating your personalized course..."):
-                course = generate_course(topic, level, duration)
+                user_stats = st.session_state.user_data[st.session_state.current_user]
+                # Refresh dashboard recommendations for the new topic alongside the course
+                history = [c['user_topic'] for c in user_stats['courses']] + [topic]
+                quiz_options = (quiz_difficulty, quiz_questions) if with_quiz else None
+                course = generate_course(topic, level, duration, history, user_stats['learning_preferences'], quiz_options)
                 
                 if course:
                     st.session_state.user_data[st.session_state.current_user]['courses'].append(course)
                     st.session_state.user_data[st.session_state.current_user]['courses_completed'] += 1
                     
                     st.markdown('<div class="success-msg">✅ Course Generated Successfully!</div>', unsafe_allow_html=True)
+                    if with_quiz and st.session_state.get('current_quiz'):
+                        st.info("📝 Your quiz is ready in the Take Quiz page!")
                     
                     st.markdown(f"### 📖 {course['title']}")
                     st.write(course['description'])
@@ -579,29 +667,28 @@ def quiz_page():
         col1, col2 = st.columns(2)
         with col1:
             if st.button("✅ Submit Quiz", use_container_width=True):
-                correct = 0
-                for idx, q in enumerate(quiz['questions']):
-                    if st.session_state.quiz_answers.get(idx) == q['correct']:
-                        correct += 1
+                questions = quiz['questions']
+                correct_answers = np.array([q['correct'] for q in questions])
+                user_answers = np.array([st.session_state.quiz_answers.get(idx, '') for idx in range(len(questions))])
+                is_correct = user_answers == correct_answers
+                correct = int(is_correct.sum())
                 
-                score = (correct / len(quiz['questions'])) * 100
+                score = float(is_correct.mean()) * 100
                 st.session_state.quiz_score = score
                 
                 user_stats = st.session_state.user_data[st.session_state.current_user]
                 user_stats['quizzes_taken'] += 1
                 user_stats['total_score'] += score
-                user_stats['quiz_history'].append({
-                    'topic': st.session_state.quiz_topic,
-                    'score': score,
-                    'date': datetime.now().strftime("%Y-%m-%d %H:%M")
-                })
+                quiz_history = user_stats['quiz_history']
+                quiz_history['topics'].append(st.session_state.quiz_topic)
+                quiz_history['scores'].append(score)
+                quiz_history['dates'].append(current_timestamp())
                 
                 st.balloons()
-                st.success(f"🎉 You scored {score:.1f}% ({correct}/{len(quiz['questions'])} correct)")
+                st.success(f"🎉 You scored {score:.1f}% ({correct}/{len(questions)} correct)")
                 
-                for idx, q in enumerate(quiz['questions']):
-                    user_answer = st.session_state.quiz_answers.get(idx)
-                    if user_answer == q['correct']:
+                for idx, (q, ok) in enumerate(zip(questions, is_correct)):
+                    if ok:
                         st.success(f"Q{idx+1}: ✅ Correct!")
                     else:
                         st.error(f"Q{idx+1}: ❌ Incorrect. Correct answer: {q['correct']}")
@@ -615,32 +702,55 @@ def quiz_page():
                 st.rerun()
 
 # Analytics Page
+@st.cache_data(ttl=300, show_spinner=False)
+def performance_chart(dates, scores):
+    """Line chart of quiz scores over time, rebuilt only when the history changes"""
+    # pandas and plotly are slow to import, so load them only once analytics are shown
+    import pandas as pd
+    import plotly.express as px
+    
+    df = pd.DataFrame({'date': pd.to_datetime(list(dates)), 'score': scores})
+    fig = px.line(df, x='date', y='score', title='📈 Quiz Performance Over Time',
+                  labels={'score': 'Score (%)', 'date': 'Date'})
+    fig.update_traces(line_color='#667eea', line_width=3)
+    return fig
+
+@st.cache_data(ttl=300, show_spinner=False)
+def topic_chart(topics, scores):
+    """Bar chart of average score per topic, rebuilt only when the history changes"""
+    import pandas as pd
+    import plotly.express as px
+    
+    topic_names, topic_idx = np.unique(topics, return_inverse=True)
+    topic_scores = pd.DataFrame({
+        'topic': topic_names,
+        'score': np.bincount(topic_idx, weights=scores) / np.bincount(topic_idx)
+    })
+    fig = px.bar(topic_scores, x='topic', y='score', title='📚 Average Score by Topic',
+                 labels={'score': 'Average Score (%)', 'topic': 'Topic'})
+    fig.update_traces(marker_color='#764ba2')
+    return fig
+
 def analytics_page():
     st.markdown('<h1 class="main-header">📊 Learning Analytics</h1>', unsafe_allow_html=True)
     
     user_stats = st.session_state.user_data[st.session_state.current_user]
     
-    if not user_stats['quiz_history']:
+    quiz_history = user_stats['quiz_history']
+    if not quiz_history['scores']:
         st.info("📚 Take some quizzes to see your analytics!")
         return
     
-    # Performance over time
-    df = pd.DataFrame(user_stats['quiz_history'])
-    df['date'] = pd.to_datetime(df['date'])
+    scores = np.asarray(quiz_history['scores'], dtype=float)
     
     col1, col2 = st.columns(2)
     
     with col1:
-        fig = px.line(df, x='date', y='score', title='📈 Quiz Performance Over Time',
-                      labels={'score': 'Score (%)', 'date': 'Date'})
-        fig.update_traces(line_color='#667eea', line_width=3)
+        fig = performance_chart(tuple(quiz_history['dates']), tuple(quiz_history['scores']))
         st.plotly_chart(fig, use_container_width=True)
     
     with col2:
-        topic_scores = df.groupby('topic')['score'].mean().reset_index()
-        fig = px.bar(topic_scores, x='topic', y='score', title='📚 Average Score by Topic',
-                     labels={'score': 'Average Score (%)', 'topic': 'Topic'})
-        fig.update_traces(marker_color='#764ba2')
+        fig = topic_chart(tuple(quiz_history['topics']), tuple(quiz_history['scores']))
         st.plotly_chart(fig, use_container_width=True)
     
     # Progress metrics
@@ -648,15 +758,15 @@ def analytics_page():
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        avg_score = df['score'].mean()
+        avg_score = scores.mean()
         st.metric("Average Score", f"{avg_score:.1f}%", f"+{avg_score-50:.1f}% from baseline")
     
     with col2:
-        improvement = df['score'].iloc[-1] - df['score'].iloc[0] if len(df) > 1 else 0
+        improvement = scores[-1] - scores[0] if len(scores) > 1 else 0
         st.metric("Improvement", f"{improvement:+.1f}%", "Since first quiz")
     
     with col3:
-        best_score = df['score'].max()
+        best_score = scores.max()
         st.metric("Best Score", f"{best_score:.1f}%", "Personal best")
 
 # Profile Page